@@ -1,6 +1,8 @@
 # --- Standard Library Imports ---
 import os
 import sys
+import gzip
+import mmap
 import shutil
 import fnmatch
 import tempfile
@@ -10,8 +12,9 @@ import json
 import time
 import traceback
 import threading
-import queue
 import re
+import collections
+from concurrent.futures import ThreadPoolExecutor, as_completed
 # --- UI and Core Logic Imports ---
 import tkinter as tk
 from tkinter import ttk
@@ -51,53 +54,209 @@ except ImportError:
     pathspec = None
     PATHSPEC_AVAILABLE = False
     print("Warning: 'pathspec' library not found. .gitignore handling disabled.")
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+# Larger copy buffer amortizes syscall overhead on the fallback path that
+# shutil uses when zero-copy (sendfile/fcopyfile) is unavailable.
+if hasattr(shutil, "COPY_BUFSIZE"):
+    shutil.COPY_BUFSIZE = max(shutil.COPY_BUFSIZE, 1024 * 1024)
+# posix_fadvise is Linux/BSD only; cache the capability check once.
+FADVISE_AVAILABLE = hasattr(os, "posix_fadvise")
+# Function-signature patterns per extension, compiled once at import so the
+# per-file extraction pass never touches re's internal cache.
+FUNC_PATTERNS = {
+    # Python: def function_name(params):
+    ".py": re.compile(r'^\s*def\s+(\w+)\s*\((.*?)\):', re.MULTILINE),
+    # GDScript: func function_name(params):
+    ".gd": re.compile(r'^\s*func\s+(\w+)\s*\((.*?)\):', re.MULTILINE),
+    # Rust: fn function_name(params) -> return_type {
+    ".rs": re.compile(
+        r'^\s*(?:pub\s+)?(?:async\s+)?fn\s+(\w+)\s*\((.*?)\)(?:\s*->\s*([^{]+))?',
+        re.MULTILINE,
+    ),
+    # GLSL/Godot Shader: void/float/vec2/etc function_name(params) {
+    ".gdshader": re.compile(
+        r'^\s*(?:void|float|int|vec[234]|mat[234]|bool)\s+(\w+)\s*\((.*?)\)',
+        re.MULTILINE,
+    ),
+}
 # --- File System Event Handler (Watchdog) ---
 class ProjectChangeHandler(FileSystemEventHandler):
     """Handles file system events detected by watchdog."""
-    def __init__(self, callback_queue):
+    MAX_TRACKED_PATHS = 50  # Beyond this a full refresh is cheaper anyway
+    def __init__(self, callback_queue, notify=None, is_relevant=None):
         super().__init__()
         self.queue = callback_queue
-        self.last_event_time = 0
-        self.debounce_delay = 1.0  # Debounce delay in seconds
+        self.notify = notify  # Wakes the Tk main loop after an enqueue
+        self.is_relevant = is_relevant  # Same filters the refresh walk uses
+        self.debounce_delay = 1.0  # Quiet period before a refresh fires
+        self._debounce_timer = None
+        self._deadline = 0.0  # Monotonic time the quiet period ends
+        self._timer_lock = threading.Lock()
+        # Paths modified during the debounce window; None payload means
+        # "do a full refresh" (structural change or too many paths).
+        self._changed_paths = set()
+        self._structural = False
+        # True while a ("refresh", ...) tuple sits undrained in the queue;
+        # keeps the queue at one pending refresh even if the UI thread is
+        # blocked (e.g. behind a modal dialog) through several bursts.
+        self._refresh_queued = False
     def schedule_refresh(self):
-        """Schedules a refresh call via the queue with debouncing."""
-        current_time = time.time()
-        if (
-            current_time - self.last_event_time >= self.debounce_delay
-            or self.last_event_time == 0
-        ):
-            self.queue.put("refresh")
-            self.last_event_time = current_time  # Record time of this queued event
+        """Extends the quiet-period deadline for a trailing-edge refresh.
+
+        The old leading-edge check fired on the first event of a burst
+        and dropped the rest. Instead of cancelling and recreating a
+        Timer per event (a thread each time), each event just pushes a
+        monotonic deadline forward; the single armed timer sleeps out
+        any remainder when it wakes early. time.monotonic is immune to
+        the wall-clock jumps time.time is subject to.
+        """
+        with self._timer_lock:
+            self._deadline = time.monotonic() + self.debounce_delay
+            if self._debounce_timer is None:
+                self._debounce_timer = threading.Timer(
+                    self.debounce_delay, self._fire_refresh
+                )
+                self._debounce_timer.daemon = True
+                self._debounce_timer.start()
+    def _fire_refresh(self):
+        with self._timer_lock:
+            remaining = self._deadline - time.monotonic()
+            if remaining > 0:
+                # Events arrived while the timer slept; wait out the rest
+                # of the quiet period with one follow-up timer.
+                self._debounce_timer = threading.Timer(
+                    remaining, self._fire_refresh
+                )
+                self._debounce_timer.daemon = True
+                self._debounce_timer.start()
+                return
+            self._debounce_timer = None
+            if self._refresh_queued:
+                # The previous refresh tuple is still unread; keep the
+                # tracked state for mark_drained to deliver instead of
+                # growing the queue.
+                return
+            if self._structural or not self._changed_paths:
+                payload = None
+            else:
+                payload = frozenset(self._changed_paths)
+            self._changed_paths.clear()
+            self._structural = False
+            self._refresh_queued = True
+        self.queue.append(("refresh", payload))
+        if self.notify:
+            self.notify()
+    def mark_drained(self):
+        """Called by the consumer after draining the queue.
+
+        If a burst folded itself back while the entry was being drained,
+        re-arm the timer so that state is still delivered.
+        """
+        with self._timer_lock:
+            self._refresh_queued = False
+            if (
+                (self._structural or self._changed_paths)
+                and self._debounce_timer is None
+            ):
+                self._deadline = time.monotonic() + self.debounce_delay
+                self._debounce_timer = threading.Timer(
+                    self.debounce_delay, self._fire_refresh
+                )
+                self._debounce_timer.daemon = True
+                self._debounce_timer.start()
+    def cancel_pending(self):
+        """Drops any armed debounce timer (called when watching stops)."""
+        with self._timer_lock:
+            if self._debounce_timer is not None:
+                self._debounce_timer.cancel()
+                self._debounce_timer = None
     def on_any_event(self, event):
         """Called when watchdog detects any file system change."""
-        if not event.is_directory:
-            path_str = event.src_path
-            # Basic check to avoid common noisy events - might need refinement
-            # Check against the temp_dir name directly
-            if ".git" not in path_str and Progomatter.TEMP_DIR_NAME not in path_str:
-                self.schedule_refresh()
+        if event.is_directory:
+            return
+        path_str = event.src_path
+        # Basic check to avoid common noisy events - might need refinement
+        # Check against the temp_dir name directly
+        if ".git" in path_str or Progomatter.TEMP_DIR_NAME in path_str:
+            return
+        dest_path = getattr(event, "dest_path", None)
+        if self.is_relevant is not None:
+            # A move counts if either end of it would appear in the output.
+            if not self.is_relevant(path_str) and not (
+                dest_path and self.is_relevant(dest_path)
+            ):
+                return
+        with self._timer_lock:
+            if event.event_type == "modified":
+                if len(self._changed_paths) < self.MAX_TRACKED_PATHS:
+                    self._changed_paths.add(path_str)
+                else:
+                    self._structural = True
+            else:
+                # Created/deleted/moved entries change the file set itself.
+                self._structural = True
+        self.schedule_refresh()
 # --- Main Application Class ---
 class Progomatter:
     """Main application class for Progomatter using standard tkinter/ttk."""
     TEMP_DIR_NAME = "progomatter_files"
+    MAX_LOG_LINES = 1000  # Oldest status lines beyond this are dropped
+    # Files that never match .include but still shape the output; a watch
+    # event on one of these always warrants a refresh.
+    CONFIG_FILE_NAMES = frozenset(
+        {".include", ".gitignore", "read this first.md"}
+    )
+    # Combined-export section framing, encoded once instead of per file.
+    COMBINED_HEAD = b"===== FILE: "
+    COMBINED_TAIL = b" =====\n"
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("Progomatter v4.0")
         self.root.geometry("600x450")
         # --- Initialize variables ---
+        # Status log ring buffer; flushed to the Text widget in batches so
+        # chatty refreshes don't issue one Tk insert per message.
+        self._log_buffer = collections.deque(maxlen=500)
+        self._log_flush_lock = threading.Lock()
+        self._log_flush_scheduled = False
+        # Plain flag checked on the log path; winfo_exists() is a Tcl
+        # round-trip and not safe from worker threads anyway.
+        self._shutting_down = False
         self.projects_file = Path("projects.json")
         self.projects = self.load_projects()
         self.selected_project = None
         self.temp_dir = Path(tempfile.gettempdir()) / self.TEMP_DIR_NAME
         self.temp_dir.mkdir(exist_ok=True)  # Ensure it exists
         self.gitignore_spec = None
+        # Resolved once for the app's lifetime; the temp path never moves,
+        # so per-refresh resolve() syscalls were pure waste.
+        try:
+            self._temp_dir_str = str(self.temp_dir.resolve())
+        except OSError:
+            self._temp_dir_str = str(self.temp_dir)
         self.include_patterns = []
+        self._include_re = None  # Single compiled alternation of .include globs
+        self._include_spec = None  # pathspec-compiled .include (preferred)
+        self._has_include = False
+        self._ignore_cache = {}  # rel_parts tuple -> ignored? (directories only)
+        self._gitignore_cache = {}  # path str -> (mtime_ns, size, compiled spec)
         self.file_notes = {}  # Dictionary to store notes: {relative_path_str: note_text}
         # --- Tkinter Option Vars ---
         # Controls Markdown file with paths
         self.create_paths_md_var = BooleanVar(value=True)  # Default to True
         # Controls function extraction in MD file
         self.extract_functions_var = BooleanVar(value=False)
+        # Controls newline-delimited JSON content export
+        self.create_ndjson_var = BooleanVar(value=False)
+        # Controls gzip compression of the NDJSON export
+        self.compress_ndjson_var = BooleanVar(value=False)
+        # Controls the single combined text export
+        self.combine_files_var = BooleanVar(value=False)
         # Controls copying individual files to temp dir
         self.copy_individual_files_var = BooleanVar(value=False)
         # Controls conversion of *copied* files
@@ -105,15 +264,38 @@ class Progomatter:
         # Auto refresh
         self.auto_refresh_var = BooleanVar(value=WATCHDOG_AVAILABLE)
         # --- File Watching Setup ---
-        self.observer = None
-        self.observer_thread = None
+        self.observer = None  # One Observer thread for the app's lifetime
+        self._watch = None  # The currently scheduled project watch, if any
+        self._change_handler = None
         self.watch_path = None
-        self.callback_queue = queue.Queue()
+        self._watch_prefix = None  # str(watch_path) + sep, for fast relpaths
+        # Single producer (watcher) / single consumer (Tk thread) that never
+        # blocks: deque append/popleft are atomic and skip queue.Queue's
+        # condition-variable locking.
+        self.callback_queue = collections.deque()
         self.include_editor_text_widget = None
+        # --- Background Refresh State ---
+        self._refresh_lock = threading.Lock()
+        self._refresh_running = False
+        self._refresh_pending = False
+        self._pending_changed = None  # Changed-path set queued behind a run
+        # --- Last Full Refresh Cache (for incremental updates) ---
+        self._last_source_dir = None
+        self._last_included = None  # rel_parts -> abs_path from last walk
+        self._last_flat_names = None  # rel_parts -> flat export filename
+        self._md_sections = None  # rel_parts -> MD lines (insertion order)
+        # flat filename -> (source abs_path, mtime_ns, size); lets a full
+        # refresh skip re-copying files that have not changed on disk.
+        self._copy_cache = {}
+        # Cached Path of the selected project's directory, set on project
+        # load so per-call code does not rebuild it.
+        self._project_root = None
         # --- Build GUI ---
         self.setup_gui()
         self.update_dependent_checkbox_states()  # Set initial states for dependent checkboxes
-        self.check_queue()
+        # Watcher threads post this virtual event after enqueuing, so the
+        # queue is drained on demand instead of being polled every 250ms.
+        self.root.bind("<<ProgomatterQueue>>", self.check_queue)
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
     def setup_gui(self):
         """Creates and arranges all the GUI widgets using tkinter/ttk."""
@@ -205,6 +387,27 @@ class Progomatter:
             command=self.on_option_change,
         )
         self.extract_functions_cb.pack(side=LEFT, padx=(0, 10))
+        ndjson_cb = ttk.Checkbutton(
+            options_frame_md,
+            text="Create content NDJSON (project_files.ndjson)",
+            variable=self.create_ndjson_var,
+            command=self.on_ndjson_change,
+        )
+        ndjson_cb.pack(side=LEFT, padx=(0, 10))
+        self.compress_ndjson_cb = ttk.Checkbutton(
+            options_frame_md,
+            text="gzip NDJSON",
+            variable=self.compress_ndjson_var,
+            command=self.on_option_change,
+        )
+        self.compress_ndjson_cb.pack(side=LEFT, padx=(0, 10))
+        combine_cb = ttk.Checkbutton(
+            options_frame_md,
+            text="Create combined file (combined_output.txt)",
+            variable=self.combine_files_var,
+            command=self.on_option_change,
+        )
+        combine_cb.pack(side=LEFT, padx=(0, 10))
         # --- Row 4: Individual File Output Options ---
         options_frame_files = ttk.Frame(main_frame, padding=(0, 0))
         options_frame_files.grid(row=4, column=0, sticky="w", pady=(0, 0))
@@ -287,6 +490,10 @@ class Progomatter:
         """Called when 'Copy individual files' checkbox changes."""
         self.update_dependent_checkbox_states()
         self.on_option_change()
+    def on_ndjson_change(self):
+        """Called when 'Create content NDJSON' checkbox changes."""
+        self.update_dependent_checkbox_states()
+        self.on_option_change()
     def update_dependent_checkbox_states(self):
         """Enable/disable dependent checkboxes based on parent checkbox states."""
         # Convert checkbox depends on Copy checkbox
@@ -300,6 +507,12 @@ class Progomatter:
             self.extract_functions_cb.config(state=tk.NORMAL)
         else:
             self.extract_functions_cb.config(state=tk.DISABLED)
+
+        # gzip option depends on NDJSON checkbox
+        if self.create_ndjson_var.get():
+            self.compress_ndjson_cb.config(state=tk.NORMAL)
+        else:
+            self.compress_ndjson_cb.config(state=tk.DISABLED)
     # --- File Notes Management ---
     def load_file_notes(self):
         """Load file notes from project's .progomatter_notes.json file."""
@@ -310,8 +523,7 @@ class Progomatter:
         
         if notes_file.exists():
             try:
-                with open(notes_file, "r", encoding="utf-8") as f:
-                    self.file_notes = json.load(f)
+                self.file_notes = self._load_json(notes_file)
                 self.log_status(f"Loaded {len(self.file_notes)} file notes.")
             except Exception as e:
                 self.log_status(f"Error loading file notes: {e}")
@@ -326,8 +538,7 @@ class Progomatter:
         notes_file = project_dir / ".progomatter_notes.json"
         
         try:
-            with open(notes_file, "w", encoding="utf-8") as f:
-                json.dump(self.file_notes, f, indent=4)
+            self._dump_json(self.file_notes, notes_file)
         except Exception as e:
             self.log_status(f"Error saving file notes: {e}")
     def edit_file_notes(self):
@@ -337,29 +548,17 @@ class Progomatter:
                 "Error", "No project selected.", parent=self.root
             )
         
-        # Collect all current files in project
+        # Collect all current files in project using the same scandir
+        # walker as the refresh: cached DirEntry type info, string paths,
+        # and ignored directories pruned before descent.
         source_dir = Path(self.selected_project["directory"])
         current_files = []
-        
-        for root, dirs, files in os.walk(source_dir, topdown=True):
-            root_path = Path(root)
-            # Filter directories
-            original_dir_count = len(dirs)
-            filtered_dirs = [
-                d for d in dirs if not self.should_ignore(root_path / d, True)
-            ]
-            dirs[:] = filtered_dirs
-            
-            for filename in files:
-                file_path = root_path / filename
-                if self.should_ignore(file_path, False):
-                    continue
-                if self.include_patterns and not self.should_include(file_path):
-                    continue
-                
-                relative_path = file_path.relative_to(source_dir)
-                current_files.append(str(relative_path.as_posix()))
-        
+        for rel_parts, abs_path, _entry in self._walk_scandir(source_dir):
+            if self._should_ignore_entry(rel_parts, abs_path, False):
+                continue
+            if self._has_include and not self.should_include_rel(rel_parts):
+                continue
+            current_files.append("/".join(rel_parts))
         current_files.sort()
         
         # Create editor window
@@ -500,36 +699,33 @@ class Progomatter:
         Supports: .py, .gd, .rs, .gdshader
         Returns: List of function signature strings
         """
-        extension = file_path.suffix.lower()
-        functions = []
-        
         try:
             with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                 content = f.read()
-            
+        except Exception as e:
+            self.log_status(f"Error extracting functions from {file_path.name}: {e}")
+            return []
+        return self._extract_functions_from_source(file_path.suffix.lower(), content)
+    def _extract_functions_from_source(self, extension: str, content: str) -> list:
+        """Extract function signatures from already-read source text."""
+        functions = []
+
+        pattern = FUNC_PATTERNS.get(extension)
+        if pattern is None:
+            return functions
+        try:
             if extension == '.py':
-                # Python: def function_name(params):
-                pattern = r'^\s*def\s+(\w+)\s*\((.*?)\):'
-                matches = re.finditer(pattern, content, re.MULTILINE)
-                for match in matches:
+                for match in pattern.finditer(content):
                     func_name = match.group(1)
                     params = match.group(2).strip()
                     functions.append(f"def {func_name}({params})")
-            
             elif extension == '.gd':
-                # GDScript: func function_name(params):
-                pattern = r'^\s*func\s+(\w+)\s*\((.*?)\):'
-                matches = re.finditer(pattern, content, re.MULTILINE)
-                for match in matches:
+                for match in pattern.finditer(content):
                     func_name = match.group(1)
                     params = match.group(2).strip()
                     functions.append(f"func {func_name}({params})")
-            
             elif extension == '.rs':
-                # Rust: fn function_name(params) -> return_type {
-                pattern = r'^\s*(?:pub\s+)?(?:async\s+)?fn\s+(\w+)\s*\((.*?)\)(?:\s*->\s*([^{]+))?'
-                matches = re.finditer(pattern, content, re.MULTILINE)
-                for match in matches:
+                for match in pattern.finditer(content):
                     func_name = match.group(1)
                     params = match.group(2).strip()
                     return_type = match.group(3).strip() if match.group(3) else ""
@@ -537,52 +733,103 @@ class Progomatter:
                         functions.append(f"fn {func_name}({params}) -> {return_type}")
                     else:
                         functions.append(f"fn {func_name}({params})")
-            
             elif extension == '.gdshader':
-                # GLSL/Godot Shader: void/float/vec2/etc function_name(params) {
-                pattern = r'^\s*(?:void|float|int|vec[234]|mat[234]|bool)\s+(\w+)\s*\((.*?)\)'
-                matches = re.finditer(pattern, content, re.MULTILINE)
-                for match in matches:
+                for match in pattern.finditer(content):
                     func_name = match.group(1)
                     params = match.group(2).strip()
                     functions.append(f"{func_name}({params})")
-        
         except Exception as e:
-            self.log_status(f"Error extracting functions from {file_path.name}: {e}")
-        
+            self.log_status(f"Error parsing functions from source: {e}")
+
         return functions
+    # --- Content Helpers ---
+    @staticmethod
+    def _looks_binary(sample: bytes) -> bool:
+        """Cheap binary sniff: a NUL byte in the leading bytes.
+
+        Same heuristic git uses; catches images/executables/archives
+        without decoding the whole file.
+        """
+        return b"\x00" in sample
+    # --- JSON Helpers ---
+    @staticmethod
+    def _load_json(path):
+        """Parse a JSON file, preferring orjson's C decoder when present."""
+        if ORJSON_AVAILABLE:
+            with open(path, "rb") as f:
+                return orjson.loads(f.read())
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    @staticmethod
+    def _dump_json(obj, path):
+        """Write obj as indented JSON, preferring orjson's C encoder.
+
+        Writes via a .tmp sidecar published with os.replace, so a crash
+        mid-write can never truncate projects.json or the notes file.
+        """
+        tmp_path = str(path) + ".tmp"
+        if ORJSON_AVAILABLE:
+            with open(tmp_path, "wb") as f:
+                f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+        else:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(obj, f, indent=4)
+        os.replace(tmp_path, path)
     # --- Logging, Project Load/Save ---
     def log_status(self, message):
         timestamp = time.strftime("%H:%M:%S")
-        full_message = f"[{timestamp}] {message}\n"
-        def update_widget():
-            try:
-                if self.status_text.winfo_exists():
-                    self.status_text.insert(END, full_message)
-                    self.status_text.see(END)
-            except tk.TclError:
-                pass
+        self._log_buffer.append(f"[{timestamp}] {message}\n")
+        self._schedule_log_flush()
+        print(f"LOG: {message}")
+    def _schedule_log_flush(self):
+        with self._log_flush_lock:
+            if self._log_flush_scheduled:
+                return
+            self._log_flush_scheduled = True
+        if self._shutting_down:
+            with self._log_flush_lock:
+                self._log_flush_scheduled = False
+            return
         try:
-            if threading.current_thread() is threading.main_thread():
-                update_widget()
-            else:
-                if self.root.winfo_exists():
-                    self.root.after(0, update_widget)
+            self.root.after(100, self._flush_log)
         except Exception as e:
-            print(f"Error logging status: {e}")
-        print(f"LOG: {message}")
+            print(f"Error scheduling log flush: {e}")
+            with self._log_flush_lock:
+                self._log_flush_scheduled = False
+    def _flush_log(self):
+        """Drains buffered log lines into the status widget in one insert."""
+        with self._log_flush_lock:
+            self._log_flush_scheduled = False
+        if self._shutting_down or not self._log_buffer:
+            return
+        lines = []
+        while self._log_buffer:
+            try:
+                lines.append(self._log_buffer.popleft())
+            except IndexError:
+                break
+        try:
+            self.status_text.insert(END, "".join(lines))
+            line_count = int(self.status_text.index("end-1c").split(".")[0])
+            if line_count > self.MAX_LOG_LINES:
+                self.status_text.delete(
+                    "1.0", f"{line_count - self.MAX_LOG_LINES}.0"
+                )
+            self.status_text.see(END)
+        except tk.TclError:
+            pass
     def clear_status(self):
+        if self._shutting_down:
+            return
         try:
-            if self.status_text.winfo_exists():
-                self.status_text.delete(1.0, END)
+            self.status_text.delete(1.0, END)
         except tk.TclError:
             pass
     def load_projects(self):
         if not self.projects_file.exists():
             return []
         try:
-            with open(self.projects_file, "r", encoding="utf-8") as f:
-                return json.load(f)
+            return self._load_json(self.projects_file)
         except Exception as e:
             messagebox.showerror(
                 "Load Error",
@@ -592,8 +839,7 @@ class Progomatter:
             return []
     def save_projects(self):
         try:
-            with open(self.projects_file, "w", encoding="utf-8") as f:
-                json.dump(self.projects, f, indent=4)
+            self._dump_json(self.projects, self.projects_file)
         except Exception as e:
             self.log_status(f"Error saving projects: {e}")
             messagebox.showerror(
@@ -651,7 +897,15 @@ class Progomatter:
             self.project_dropdown["values"] = [p["project_name"] for p in self.projects]
             self.dir_label.config(text="No project selected")
             self.include_patterns = []
+            self._compile_include_patterns()
             self.gitignore_spec = None
+            self._ignore_cache = {}
+            self._last_source_dir = None
+            self._last_included = None
+            self._last_flat_names = None
+            self._md_sections = None
+            self._copy_cache = {}
+            self._project_root = None
             self.file_notes = {}
             self.clear_status()
             self.clear_temp_folder()
@@ -662,6 +916,7 @@ class Progomatter:
         if project:
             self.stop_observer()
             self.selected_project = project
+            self._project_root = Path(project["directory"])
             self.dir_label.config(text=project["directory"])
             self.clear_status()
             self.log_status(f"Loading project: {name}...")
@@ -675,6 +930,7 @@ class Progomatter:
         else:
             self.log_status(f"Error: Could not find project data for '{name}'")
             self.selected_project = None
+            self._project_root = None
             self.dir_label.config(text="Project not found")
     # --- Context File Management ---
     def edit_context_file(self):
@@ -716,16 +972,19 @@ class Progomatter:
         scrollbar.grid(row=0, column=1, sticky="ns")
         context_text_widget.config(yscrollcommand=scrollbar.set)
         
-        # Load existing content if file exists
-        if context_path.exists():
-            try:
-                with open(context_path, "r", encoding="utf-8") as f:
-                    context_text_widget.insert("1.0", f.read())
-                context_text_widget.edit_reset()
-            except Exception as e:
-                messagebox.showerror(
-                    "Error", f"Could not read context file:\n{e}", parent=editor_win
-                )
+        # Load existing content; a missing file just means a fresh editor,
+        # so read directly instead of probing with exists() first.
+        try:
+            context_text_widget.insert(
+                "1.0", context_path.read_text(encoding="utf-8")
+            )
+            context_text_widget.edit_reset()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            messagebox.showerror(
+                "Error", f"Could not read context file:\n{e}", parent=editor_win
+            )
         
         button_frame = ttk.Frame(editor_frame)
         button_frame.pack(fill=X)
@@ -770,16 +1029,18 @@ class Progomatter:
         project_dir = Path(self.selected_project["directory"])
         context_path = project_dir / "read this first.md"
         
-        if context_path.exists():
-            try:
-                dest_path = self.temp_dir / "read this first.md"
-                shutil.copy2(context_path, dest_path)
-                self.log_status("Copied 'read this first.md' to output folder.")
-            except Exception as e:
-                self.log_status(f"Error copying context file: {e}")
+        try:
+            dest_path = self.temp_dir / "read this first.md"
+            shutil.copyfile(context_path, dest_path)
+            self.log_status("Copied 'read this first.md' to output folder.")
+        except FileNotFoundError:
+            pass  # No context file; nothing to copy
+        except Exception as e:
+            self.log_status(f"Error copying context file: {e}")
     # --- Pattern Loading ---
     def load_gitignore(self):
         self.gitignore_spec = None
+        self._ignore_cache = {}
         path = (
             Path(self.selected_project["directory"]) / ".gitignore"
             if self.selected_project and PATHSPEC_AVAILABLE
@@ -787,10 +1048,28 @@ class Progomatter:
         )
         if path and path.is_file():
             try:
-                with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                    self.gitignore_spec = pathspec.PathSpec.from_lines(
-                        pathspec.patterns.GitWildMatchPattern, f
-                    )
+                # Reuse the compiled spec when the file hasn't changed;
+                # pattern compilation is the expensive part of a reload.
+                stat = path.stat()
+                cache_key = str(path)
+                cached = self._gitignore_cache.get(cache_key)
+                if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                    self.gitignore_spec = cached[2]
+                    self.log_status("Reusing cached .gitignore patterns.")
+                    return
+                # One read + in-memory split beats iterating the file
+                # object line by line for a file this small.
+                lines = path.read_text(
+                    encoding="utf-8", errors="ignore"
+                ).splitlines()
+                self.gitignore_spec = pathspec.PathSpec.from_lines(
+                    pathspec.patterns.GitWildMatchPattern, lines
+                )
+                self._gitignore_cache[cache_key] = (
+                    stat.st_mtime_ns,
+                    stat.st_size,
+                    self.gitignore_spec,
+                )
                 self.log_status("Loaded .gitignore patterns.")
             except Exception as e:
                 self.log_status(f"Error reading .gitignore: {e}")
@@ -803,43 +1082,137 @@ class Progomatter:
         )
         if path and path.is_file():
             try:
-                with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                    self.include_patterns = [
-                        ln.strip()
-                        for ln in f
-                        if ln.strip() and not ln.strip().startswith("#")
-                    ]
+                self.include_patterns = [
+                    stripped
+                    for ln in path.read_text(
+                        encoding="utf-8", errors="ignore"
+                    ).splitlines()
+                    if (stripped := ln.strip()) and not stripped.startswith("#")
+                ]
                 self.log_status(
                     f"Loaded {len(self.include_patterns)} patterns from .include."
                 )
             except Exception as e:
                 self.log_status(f"Error reading .include: {e}")
+        self._compile_include_patterns()
+    def _compile_include_patterns(self):
+        """Compile the .include globs once instead of per (file, pattern).
+
+        Prefers pathspec's gitwildmatch so .include actually follows
+        .gitignore formatting as the README promises (directory-scoped
+        patterns like src/*.py work); otherwise falls back to a single
+        regex alternation over filenames via fnmatch.translate.
+        """
+        self._has_include = bool(self.include_patterns)
+        self._include_spec = None
+        self._include_re = None
+        if not self._has_include:
+            return
+        if PATHSPEC_AVAILABLE:
+            try:
+                self._include_spec = pathspec.PathSpec.from_lines(
+                    pathspec.patterns.GitWildMatchPattern, self.include_patterns
+                )
+                return
+            except Exception as e:
+                self.log_status(f"Warn: Bad .include pattern for pathspec: {e}")
+        try:
+            self._include_re = re.compile(
+                "(?:" + "|".join(fnmatch.translate(p) for p in self.include_patterns) + ")"
+            )
+        except re.error as e:
+            self.log_status(f"Warn: Bad .include pattern, falling back: {e}")
+            self._include_re = None
     # --- File Filtering ---
+    def _should_ignore_entry(self, rel_parts: tuple, abs_path: str, is_dir: bool) -> bool:
+        """Ignore check working on pre-split relative parts and string paths.
+
+        Avoids re-resolving the temp dir and calling Path.relative_to for
+        every entry in the walk hot loop. Directory verdicts are cached so
+        repeated walks (file-notes editor, watch events) skip the gitignore
+        match entirely; pruned directories already short-circuit their
+        whole subtree.
+        """
+        if is_dir:
+            cached = self._ignore_cache.get(rel_parts)
+            if cached is not None:
+                return cached
+        if ".git" in rel_parts:
+            ignored = True
+        elif self._temp_dir_str is not None and abs_path == self._temp_dir_str:
+            ignored = True
+        elif self.gitignore_spec:
+            try:
+                path_str = "/".join(rel_parts) + ("/" if is_dir else "")
+                ignored = bool(self.gitignore_spec.match_file(path_str))
+            except Exception:
+                ignored = False
+        else:
+            ignored = False
+        if is_dir:
+            self._ignore_cache[rel_parts] = ignored
+        return ignored
     def should_ignore(self, path_obj: Path, is_dir: bool) -> bool:
         if not self.selected_project:
             return False
-        project_dir = Path(self.selected_project["directory"])
-        if ".git" in path_obj.parts:
-            return True
+        project_dir = self._project_root
+        if project_dir is None:
+            project_dir = Path(self.selected_project["directory"])
         try:
-            if path_obj.resolve() == self.temp_dir.resolve():
-                return True
-        except OSError:
-            pass
-        if self.gitignore_spec:
+            rel_parts = path_obj.relative_to(project_dir).parts
+        except ValueError:
+            return False
+        return self._should_ignore_entry(rel_parts, str(path_obj), is_dir)
+    def _walk_scandir(self, source_dir, counters=None):
+        """Yield (rel_parts, abs_path, dir_entry) for files under source_dir.
+
+        Iterative os.scandir traversal: reuses the file-type information
+        cached on each DirEntry instead of re-statting, prunes ignored
+        directories before descending, and works with string paths so
+        the hot loop does not churn Path objects. The DirEntry rides
+        along so consumers can use its cached stat instead of issuing
+        their own.
+        """
+        stack = [(str(source_dir), ())]
+        while stack:
+            dir_path, rel_parts = stack.pop()
             try:
-                rel_path = path_obj.relative_to(project_dir)
-                path_str = str(rel_path.as_posix()) + ("/" if is_dir else "")
-                return self.gitignore_spec.match_file(path_str)
-            except ValueError:
-                return False
+                entries = os.scandir(dir_path)
+            except OSError as e:
+                self.log_status(f"Warn: Could not scan {dir_path}: {e}")
+                continue
+            with entries:
+                for entry in entries:
+                    child_parts = rel_parts + (entry.name,)
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if is_dir:
+                        if self._should_ignore_entry(child_parts, entry.path, True):
+                            if counters is not None:
+                                counters["ignored_dirs"] += 1
+                            continue
+                        stack.append((entry.path, child_parts))
+                    else:
+                        yield child_parts, entry.path, entry
+    def should_include_rel(self, rel_parts: tuple) -> bool:
+        """Include check against the full relative path (pathspec) with a
+        name-only regex fallback."""
+        if not self._has_include:
+            return True
+        if self._include_spec is not None:
+            try:
+                return self._include_spec.match_file("/".join(rel_parts))
             except Exception:
                 return False
-        return False
-    def should_include(self, path_obj: Path) -> bool:
-        if not self.include_patterns:
+        return self.should_include(rel_parts[-1])
+    def should_include(self, name: str) -> bool:
+        if not self._has_include:
             return True
-        name = path_obj.name
+        if self._include_re is not None:
+            return self._include_re.match(name) is not None
+        # Fallback if pattern compilation failed
         for pattern in self.include_patterns:
             try:
                 if fnmatch.fnmatch(name, pattern):
@@ -849,21 +1222,71 @@ class Progomatter:
         return False
     # --- Temp Folder ---
     def clear_temp_folder(self):
+        self._copy_cache = {}  # The copies this cache describes are going away
         if not self.temp_dir.exists():
             try:
                 self.temp_dir.mkdir(exist_ok=True)
-                return
             except Exception as e:
                 self.log_status(f"Error creating temp directory: {e}")
-                return
-        for item in self.temp_dir.iterdir():
+            return
+        # The output layout is flat, so the normal case is a straight
+        # unlink per entry using the type info scandir already has;
+        # rmtree only runs if something nested snuck in.
+        try:
+            entries = os.scandir(self.temp_dir)
+        except OSError as e:
+            self.log_status(f"Error scanning temp directory: {e}")
+            return
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        shutil.rmtree(entry.path)
+                    else:
+                        os.unlink(entry.path)
+                except Exception as e:
+                    self.log_status(
+                        f"Warn: Error deleting temp item {entry.name}: {e}"
+                    )
+    def _sweep_temp_dir(self, keep_names):
+        """Deletes temp entries whose names are not in keep_names.
+
+        Runs at the end of a full refresh in place of the old
+        clear-everything-first pass, so unchanged copies survive between
+        refreshes. Copy-cache entries for swept names are dropped too.
+        """
+        try:
+            entries = os.scandir(self.temp_dir)
+        except OSError as e:
+            self.log_status(f"Error scanning temp directory: {e}")
+            return
+
+        def remove(entry):
             try:
-                if item.is_file() or item.is_symlink():
-                    item.unlink()
-                elif item.is_dir():
-                    shutil.rmtree(item)
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
             except Exception as e:
-                self.log_status(f"Warn: Error deleting temp item {item.name}: {e}")
+                self.log_status(
+                    f"Warn: Error deleting temp item {entry.name}: {e}"
+                )
+
+        with entries:
+            doomed = [e for e in entries if e.name not in keep_names]
+        if len(doomed) > 100:
+            # Unlinks are latency-bound on slow/networked filesystems;
+            # big sweeps (project switch, options change) go parallel.
+            max_workers = min(16, (os.cpu_count() or 1) * 4)
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                for _ in pool.map(remove, doomed):
+                    pass
+        else:
+            for entry in doomed:
+                remove(entry)
+        for name in list(self._copy_cache):
+            if name not in keep_names:
+                del self._copy_cache[name]
     def open_temp_folder(self):
         if not self.temp_dir.exists():
             try:
@@ -877,7 +1300,7 @@ class Progomatter:
                 )
                 return
         try:
-            path = str(self.temp_dir.resolve())
+            path = self._temp_dir_str
             self.log_status(f"Opening folder: {path}")
             if sys.platform == "win32":
                 os.startfile(path)
@@ -892,15 +1315,186 @@ class Progomatter:
                 parent=self.root,
             )
     # --- Core File Refresh ---
-    def refresh_files(self):
-        """Refreshes output based on selected options (MD file, individual files)."""
+    def refresh_files(self, changed_paths=None):
+        """Schedules a refresh on a background worker thread.
+
+        The walk/copy work is I/O bound and used to stall the Tk main
+        loop; it now runs on a daemon thread, with log updates marshalled
+        back via log_status. Requests arriving mid-refresh coalesce into
+        a single follow-up run. changed_paths (absolute path strings from
+        the watcher) enables the incremental fast path; None forces a
+        full walk.
+        """
         if not self.selected_project:
             self.log_status("Refresh skipped: No project selected.")
             return
+        with self._refresh_lock:
+            if self._refresh_running:
+                if not self._refresh_pending:
+                    self._pending_changed = changed_paths
+                elif self._pending_changed is not None:
+                    # Merge change sets; any full request wins.
+                    self._pending_changed = (
+                        None
+                        if changed_paths is None
+                        else self._pending_changed | frozenset(changed_paths)
+                    )
+                self._refresh_pending = True
+                return
+            self._refresh_running = True
+        threading.Thread(
+            target=self._refresh_worker, args=(changed_paths,), daemon=True
+        ).start()
+    def _refresh_worker(self, changed_paths=None):
+        """Runs refreshes until no follow-up request is pending."""
+        while True:
+            try:
+                self._do_refresh(changed_paths)
+            except Exception as e:
+                self.log_status(f"Critical Error during file refresh: {str(e)}")
+                traceback.print_exc()
+            with self._refresh_lock:
+                if not self._refresh_pending:
+                    self._refresh_running = False
+                    return
+                self._refresh_pending = False
+                changed_paths = self._pending_changed
+                self._pending_changed = None
+    def _build_md_section(self, rel_path_str, functions):
+        """Builds the paths-MD lines for one file (note + functions)."""
+        lines = [f"### `{rel_path_str}`"]
+        note = self.file_notes.get(rel_path_str)
+        if note and note.strip():
+            lines.append("")
+            lines.append("**Note:**")
+            for line in note.strip().split('\n'):
+                lines.append(f"> {line}")
+            lines.append("")
+        if functions:
+            lines.append("")
+            lines.append("**Functions:**")
+            for func in functions:
+                lines.append(f"- `{func}`")
+        lines.append("")  # Blank line between files
+        return lines
+    def _write_paths_md(self, source_dir, md_lines):
+        """Writes the paths MD file; raises on I/O failure.
+
+        Writes to a sidecar and publishes with os.replace, so a user
+        dragging files out mid-refresh never sees a half-written MD.
+        """
+        md_output_path = self.temp_dir / "project_file_names_and_locations.md"
+        tmp_path = str(md_output_path) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("# Project File Locations\n\n")
+            f.write(f"**Project:** {self.selected_project['project_name']}\n\n")
+            f.write(f"**Root:** `{source_dir}`\n\n")
+            f.write("---\n\n")
+            f.write("## Files\n\n")
+            f.write("\n".join(md_lines))
+        os.replace(tmp_path, md_output_path)
+    def _try_incremental_refresh(self, changed_paths) -> bool:
+        """Applies watch-reported modifications in place when possible.
+
+        Only modified files already present in the last full walk qualify;
+        anything else (unknown paths, config files, NDJSON/combine
+        enabled, stale caches, copy failures) returns False so the caller
+        falls back to a full refresh. Runs on the refresh worker thread.
+        """
+        if self.create_ndjson_var.get() or self.combine_files_var.get():
+            # The NDJSON/combined streams cannot be patched without
+            # re-reading everything, so incremental buys nothing there.
+            return False
+        if (
+            not self._last_included
+            or self._last_source_dir != self.selected_project.get("directory")
+        ):
+            return False
+        do_paths_md = self.create_paths_md_var.get()
+        do_extract_functions = self.extract_functions_var.get() and do_paths_md
+        do_copy = self.copy_individual_files_var.get()
+        if do_copy and self._last_flat_names is None:
+            return False
+        if do_paths_md and self._md_sections is None:
+            return False
+        source_dir = Path(self._last_source_dir)
+        prefix = self._last_source_dir.rstrip(os.sep) + os.sep
+        changed_parts = []
+        for path_str in changed_paths:
+            if not path_str.startswith(prefix):
+                return False
+            rel_parts = tuple(path_str[len(prefix):].split(os.sep))
+            if rel_parts[-1] in self.CONFIG_FILE_NAMES:
+                # Config files shape the whole output (and the context
+                # file is only re-copied by a full refresh), so patching
+                # in place would leave stale results.
+                return False
+            if rel_parts not in self._last_included:
+                return False  # New or unknown file; need the full walk
+            changed_parts.append(rel_parts)
+        start_time = time.time()
+        temp_dir_str = str(self.temp_dir)
+        updated = 0
+        for rel_parts in changed_parts:
+            abs_path = self._last_included[rel_parts]
+            if not os.path.isfile(abs_path):
+                return False  # Deleted under us; the file set changed
+            rel_path_str = "/".join(rel_parts)
+            if do_copy:
+                flat_name = self._last_flat_names.get(rel_parts)
+                if flat_name is None:
+                    return False  # Copy failed last run; need the full walk
+                try:
+                    # Stat before the copy so the cached signature is never
+                    # newer than the bytes actually written.
+                    st = os.stat(abs_path)
+                    shutil.copyfile(
+                        abs_path, os.path.join(temp_dir_str, flat_name)
+                    )
+                    self._copy_cache[flat_name] = (
+                        abs_path, st.st_mtime_ns, st.st_size
+                    )
+                except Exception as e:
+                    self.log_status(f"Error re-copying '{rel_path_str}': {e}")
+                    return False
+            if do_extract_functions:
+                functions = self.extract_functions_from_file(Path(abs_path))
+                self._md_sections[rel_parts] = self._build_md_section(
+                    rel_path_str, functions or None
+                )
+            updated += 1
+        if do_paths_md and do_extract_functions:
+            md_lines = []
+            for section in self._md_sections.values():
+                md_lines.extend(section)
+            try:
+                self._write_paths_md(source_dir, md_lines)
+            except Exception as e:
+                self.log_status(f"Error rewriting paths MD: {e}")
+                return False
+        duration = time.time() - start_time
+        self.log_status(
+            f"Incremental refresh ({duration:.2f}s): updated {updated} file(s)."
+        )
+        return True
+    def _do_refresh(self, changed_paths=None):
+        """Refreshes output based on selected options (MD file, individual files)."""
+        if not self.selected_project:
+            return
+        if changed_paths is not None and self._try_incremental_refresh(changed_paths):
+            return
         self.log_status("Refreshing output...")
         start_time = time.time()
-        self.clear_temp_folder()
-        
+        # The temp dir is no longer cleared up front: unchanged copies are
+        # kept (see the mtime/size cache below) and stale entries are swept
+        # once the expected output set is known.
+        if not self.temp_dir.exists():
+            try:
+                self.temp_dir.mkdir(exist_ok=True)
+            except Exception as e:
+                self.log_status(f"Error creating temp directory: {e}")
+                return
+
         # Copy context file first
         self.copy_context_file_to_output()
         
@@ -911,10 +1505,13 @@ class Progomatter:
         source_dir = Path(source_dir_str)
         if not source_dir.is_dir():
             self.log_status(f"Error: Source directory not found: {source_dir}")
-            messagebox.showerror(
-                "Error",
-                f"Project source directory not found:\n{source_dir}",
-                parent=self.root,
+            self.root.after(
+                0,
+                lambda: messagebox.showerror(
+                    "Error",
+                    f"Project source directory not found:\n{source_dir}",
+                    parent=self.root,
+                ),
             )
             return
         # Get option states
@@ -922,133 +1519,435 @@ class Progomatter:
         do_extract_functions = self.extract_functions_var.get() and do_paths_md
         do_copy = self.copy_individual_files_var.get()
         do_convert = self.convert_copied_files_var.get() and do_copy
+        do_ndjson = self.create_ndjson_var.get()
+        do_combine = self.combine_files_var.get()
+        # Nothing selected: sweep stale outputs, keep the context file, and
+        # skip the project walk entirely.
+        if not (do_paths_md or do_copy or do_ndjson or do_combine):
+            keep_names = set()
+            if (source_dir / "read this first.md").is_file():
+                keep_names.add("read this first.md")
+            self._sweep_temp_dir(keep_names)
+            duration = time.time() - start_time
+            self.log_status(
+                f"Refresh finished ({duration:.2f}s). No outputs enabled;"
+                " skipped project walk."
+            )
+            return
         # Initialize collectors
         paths_md_lines = [] if do_paths_md else None
         files_in_temp = set() if do_copy else None
         copied_count, ignored_git_count, ignored_incl_count = 0, 0, 0
-        converted_count, read_error_count, collision_skips = 0, 0, 0
+        converted_count, read_error_count, collision_renames = 0, 0, 0
+        unchanged_skips = 0
         md_entries = 0
+        ndjson_records = 0
+        combined_count = 0
+        binary_skips = 0
+        # NDJSON is written record-per-line as the walk progresses, so peak
+        # memory stays at the largest single file instead of the whole repo.
+        do_compress = self.compress_ndjson_var.get() and do_ndjson
+        ndjson_file = None
+        ndjson_output_path = self.temp_dir / (
+            "project_files.ndjson.gz" if do_compress else "project_files.ndjson"
+        )
+        # Written to a sidecar and published with os.replace on success.
+        ndjson_tmp_path = str(ndjson_output_path) + ".tmp"
+        if do_ndjson:
+            try:
+                if do_compress:
+                    ndjson_file = gzip.open(ndjson_tmp_path, "wb", compresslevel=6)
+                else:
+                    ndjson_file = open(ndjson_tmp_path, "wb")
+            except Exception as e:
+                self.log_status(f"Error opening {ndjson_output_path.name}: {e}")
+                do_ndjson = False
+        # Combined output is streamed the same way: one open handle for the
+        # whole refresh, so content never has to accumulate in memory, and
+        # a large buffer keeps write syscalls per file low.
+        combined_file = None
+        combined_output_path = self.temp_dir / "combined_output.txt"
+        combined_tmp_path = str(combined_output_path) + ".tmp"
+        if do_combine:
+            try:
+                # Binary mode: source bytes pass straight through with no
+                # decode/re-encode round trip (see process_content).
+                combined_file = open(combined_tmp_path, "wb", buffering=1 << 20)
+            except Exception as e:
+                self.log_status(f"Error opening {combined_output_path.name}: {e}")
+                do_combine = False
+        # _temp_dir_str was resolved once in __init__; _should_ignore_entry
+        # compares plain strings against it.
+        temp_dir_str = str(self.temp_dir)
         try:
-            for root, dirs, files in os.walk(source_dir, topdown=True):
-                root_path = Path(root)
-                original_dir_count = len(dirs)
-                filtered_dirs = [
-                    d for d in dirs if not self.should_ignore(root_path / d, True)
+            # Phase 1: walk and filter, collecting the included file list.
+            counters = {"ignored_dirs": 0}
+            included_files = []
+            for rel_parts, abs_path, entry in self._walk_scandir(
+                source_dir, counters
+            ):
+                if self._should_ignore_entry(rel_parts, abs_path, False):
+                    ignored_git_count += 1
+                    continue
+                if self._has_include and not self.should_include_rel(rel_parts):
+                    ignored_incl_count += 1
+                    continue
+                included_files.append((rel_parts, abs_path, entry))
+            ignored_git_count += counters["ignored_dirs"]
+            # Phase 2: parallel content pass. Each file that needs its text
+            # (NDJSON record and/or function summary) is read exactly once;
+            # reads release the GIL, so a small pool overlaps disk latency.
+            # NDJSON records are written as futures complete, so content is
+            # dropped immediately instead of accumulating.
+            functions_by_parts = {}
+            if do_extract_functions or do_ndjson or do_combine:
+                def needs_extraction(name):
+                    dot = name.rfind(".")
+                    return dot != -1 and name[dot:].lower() in FUNC_PATTERNS
+
+                large_threshold = 1024 * 1024  # mmap beyond this
+
+                def process_content(rel_parts, abs_path):
+                    # Decoded text is only produced for the consumers that
+                    # need str (NDJSON, function extraction); the combined
+                    # file takes the raw bytes untouched.
+                    need_str = do_ndjson or (
+                        do_extract_functions and needs_extraction(rel_parts[-1])
+                    )
+                    with open(abs_path, "rb") as src:
+                        head = src.read(8192)
+                        if self._looks_binary(head):
+                            return None, None, None, True  # body never read
+                        size = os.fstat(src.fileno()).st_size
+                        raw = None
+                        content = None
+                        if size > large_threshold:
+                            if FADVISE_AVAILABLE:
+                                # We read front to back exactly once; ask
+                                # the kernel for aggressive readahead.
+                                try:
+                                    os.posix_fadvise(
+                                        src.fileno(), 0, 0,
+                                        os.POSIX_FADV_SEQUENTIAL,
+                                    )
+                                except OSError:
+                                    pass
+                            with mmap.mmap(
+                                src.fileno(), 0, access=mmap.ACCESS_READ
+                            ) as mapped:
+                                if do_combine:
+                                    raw = bytes(mapped)
+                                if need_str:
+                                    # Decode straight from the mapped pages;
+                                    # skips a second whole-file bytes copy.
+                                    content = str(mapped, "utf-8", "ignore")
+                        else:
+                            raw = head + src.read()
+                            if need_str:
+                                content = raw.decode("utf-8", "ignore")
+                    functions = None
+                    if do_extract_functions and needs_extraction(rel_parts[-1]):
+                        dot = rel_parts[-1].rfind(".")
+                        functions = self._extract_functions_from_source(
+                            rel_parts[-1][dot:].lower(), content
+                        )
+                    return (
+                        content if do_ndjson else None,
+                        raw if do_combine else None,
+                        functions,
+                        False,
+                    )
+
+                content_targets = [
+                    (rel_parts, abs_path)
+                    for rel_parts, abs_path, _entry in included_files
+                    if do_ndjson or do_combine or needs_extraction(rel_parts[-1])
                 ]
-                ignored_git_count += original_dir_count - len(filtered_dirs)
-                dirs[:] = filtered_dirs
-                for filename in files:
-                    file_path = root_path / filename
-                    if self.should_ignore(file_path, False):
-                        ignored_git_count += 1
-                        continue
-                    if self.include_patterns and not self.should_include(file_path):
-                        ignored_incl_count += 1
+                if content_targets:
+                    max_workers = min(32, (os.cpu_count() or 1) * 4)
+                    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                        future_map = {
+                            pool.submit(process_content, rel_parts, abs_path): rel_parts
+                            for rel_parts, abs_path in content_targets
+                        }
+                        for future in as_completed(future_map):
+                            rel_parts = future_map[future]
+                            rel_path_str = "/".join(rel_parts)
+                            try:
+                                content, raw, functions, is_binary = future.result()
+                            except Exception as read_err:
+                                self.log_status(
+                                    f"Error reading '{rel_path_str}': {read_err}"
+                                )
+                                read_error_count += 1
+                                continue
+                            if is_binary:
+                                binary_skips += 1
+                                continue
+                            if functions:
+                                functions_by_parts[rel_parts] = functions
+                            if do_ndjson:
+                                try:
+                                    # Only emit non-empty fields; empty
+                                    # content/absent notes add payload but
+                                    # no information for the consumer.
+                                    record = {"path": rel_path_str}
+                                    if content:
+                                        record["content"] = content
+                                    note = self.file_notes.get(rel_path_str)
+                                    if note and note.strip():
+                                        record["note"] = note.strip()
+                                    if ORJSON_AVAILABLE:
+                                        ndjson_file.write(
+                                            orjson.dumps(record) + b"\n"
+                                        )
+                                    else:
+                                        ndjson_file.write(
+                                            (
+                                                json.dumps(record, ensure_ascii=False)
+                                                + "\n"
+                                            ).encode("utf-8")
+                                        )
+                                    ndjson_records += 1
+                                except Exception as ndjson_err:
+                                    self.log_status(
+                                        f"Error writing NDJSON record for"
+                                        f" '{rel_path_str}': {ndjson_err}"
+                                    )
+                                    read_error_count += 1
+                            if do_combine and raw is not None:
+                                # Sections land in completion order; each
+                                # carries its own path header so order
+                                # doesn't affect the consumer.
+                                try:
+                                    # One bytes write per file: pre-encoded
+                                    # framing + raw body assembled by a
+                                    # single C-level join, no decode or
+                                    # re-encode round trip.
+                                    trailer = (
+                                        b"\n\n" if not raw.endswith(b"\n") else b"\n"
+                                    )
+                                    combined_file.write(
+                                        b"".join((
+                                            self.COMBINED_HEAD,
+                                            rel_path_str.encode("utf-8"),
+                                            self.COMBINED_TAIL,
+                                            raw,
+                                            trailer,
+                                        ))
+                                    )
+                                    combined_count += 1
+                                except Exception as comb_err:
+                                    self.log_status(
+                                        f"Error appending '{rel_path_str}' to"
+                                        f" {combined_output_path.name}: {comb_err}"
+                                    )
+                                    read_error_count += 1
+            # Phase 3: build outputs.
+            # Flat-name prefixes repeat for every file in a directory, so
+            # join the parts once per directory instead of once per file.
+            prefix_cache = {}
+            md_sections = {} if do_paths_md else None
+            flat_names = {} if do_copy else None
+            copy_jobs = [] if do_copy else None
+            collision_counters = {}  # flat name -> next rename suffix
+            # Names already present in temp, snapshotted once so the
+            # unchanged-skip check below avoids a stat per file.
+            existing_temp = set()
+            if do_copy:
+                try:
+                    with os.scandir(temp_dir_str) as it:
+                        existing_temp = {e.name for e in it}
+                except OSError:
+                    existing_temp = set()
+            for rel_parts, abs_path, entry in included_files:
+                filename = rel_parts[-1]
+                rel_path_str = "/".join(rel_parts)
+                # --- Action: Create Paths Markdown ---
+                if do_paths_md:
+                    section = self._build_md_section(
+                        rel_path_str, functions_by_parts.get(rel_parts)
+                    )
+                    paths_md_lines.extend(section)
+                    md_sections[rel_parts] = section
+                    md_entries += 1
+                # --- Action: Individual File Copy/Convert ---
+                if do_copy:
+                    dir_parts = rel_parts[:-1]
+                    path_prefix = prefix_cache.get(dir_parts)
+                    if path_prefix is None:
+                        path_prefix = "-".join(dir_parts)
+                        prefix_cache[dir_parts] = path_prefix
+                    unique_flat_filename = (
+                        f"{path_prefix}-{filename}" if path_prefix else filename
+                    )
+                    target_flat_filename = (
+                        unique_flat_filename + ".txt"
+                        if do_convert
+                        else unique_flat_filename
+                    )
+                    # One hashed add doubles as both the collision probe and
+                    # the name reservation (CPython sets cannot be pre-sized,
+                    # so fusing the membership test is what's left to save).
+                    names_before = len(files_in_temp)
+                    files_in_temp.add(target_flat_filename)
+                    if len(files_in_temp) == names_before:
+                        # Collided: allocate "name (k)" from a per-name
+                        # counter instead of dropping the file -- O(1)
+                        # against the reservation set, no exists() probes.
+                        k = collision_counters.get(target_flat_filename, 1)
+                        while True:
+                            candidate = (
+                                f"{unique_flat_filename} ({k}).txt"
+                                if do_convert
+                                else f"{unique_flat_filename} ({k})"
+                            )
+                            k += 1
+                            if candidate not in files_in_temp:
+                                break
+                        collision_counters[target_flat_filename] = k
+                        self.log_status(
+                            f"Warn: Renaming copy '{rel_path_str}' ->"
+                            f" '{candidate}' (name collision)."
+                        )
+                        target_flat_filename = candidate
+                        files_in_temp.add(candidate)
+                        collision_renames += 1
+                    # Skip the copy outright when the source's mtime/size
+                    # signature matches what produced the temp copy last
+                    # time; the walk's DirEntry usually has the stat cached.
+                    try:
+                        st = entry.stat()
+                        sig = (abs_path, st.st_mtime_ns, st.st_size)
+                    except OSError:
+                        sig = None
+                    if (
+                        sig is not None
+                        and target_flat_filename in existing_temp
+                        and self._copy_cache.get(target_flat_filename) == sig
+                    ):
+                        unchanged_skips += 1
+                        flat_names[rel_parts] = target_flat_filename
                         continue
-                    relative_path = file_path.relative_to(source_dir)
-                    rel_path_str = str(relative_path.as_posix())
-                    
-                    # --- Action: Create Paths Markdown ---
-                    if do_paths_md:
-                        paths_md_lines.append(f"### `{rel_path_str}`")
-                        
-                        # Add user note if exists
-                        if rel_path_str in self.file_notes and self.file_notes[rel_path_str].strip():
-                            note_lines = self.file_notes[rel_path_str].strip().split('\n')
-                            paths_md_lines.append("")
-                            paths_md_lines.append("**Note:**")
-                            for line in note_lines:
-                                paths_md_lines.append(f"> {line}")
-                            paths_md_lines.append("")
-                        
-                        # Extract functions if enabled and file type is supported
-                        if do_extract_functions:
-                            ext = file_path.suffix.lower()
-                            if ext in ['.py', '.gd', '.rs', '.gdshader']:
-                                functions = self.extract_functions_from_file(file_path)
-                                if functions:
-                                    paths_md_lines.append("")
-                                    paths_md_lines.append("**Functions:**")
-                                    for func in functions:
-                                        paths_md_lines.append(f"- `{func}`")
-                        
-                        paths_md_lines.append("")  # Blank line between files
-                        md_entries += 1
-                    # --- Action: Individual File Copy/Convert ---
-                    if do_copy:
-                        path_prefix = "-".join(relative_path.parts[:-1])
-                        unique_flat_filename = (
-                            f"{path_prefix}-{filename}" if path_prefix else filename
+                    # Queue the copy; the data transfer happens in a pool
+                    # below so disk latency overlaps across files.
+                    copy_jobs.append(
+                        (
+                            rel_parts,
+                            rel_path_str,
+                            abs_path,
+                            os.path.join(temp_dir_str, target_flat_filename),
+                            target_flat_filename,
+                            sig,
                         )
-                        target_flat_filename = (
-                            unique_flat_filename + ".txt"
-                            if do_convert
-                            else unique_flat_filename
+                    )
+            # Parallel copy pass. copyfile takes the platform zero-copy
+            # path (sendfile/fcopyfile) and releases the GIL while doing so.
+            if do_copy and copy_jobs:
+                max_workers = min(32, (os.cpu_count() or 1) * 4)
+                with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                    future_map = {
+                        pool.submit(shutil.copyfile, job[2], job[3]): job
+                        for job in copy_jobs
+                    }
+                    for future in as_completed(future_map):
+                        rel_parts, rel_path_str, _, target_path, flat_name, sig = (
+                            future_map[future]
                         )
-                        if target_flat_filename in files_in_temp:
-                            self.log_status(
-                                f"Warn: Skipping copy '{relative_path}' ->"
-                                f" '{target_flat_filename}' (collision)."
-                            )
-                            collision_skips += 1
-                            continue
-                        source_copy_path = self.temp_dir / unique_flat_filename
                         try:
-                            shutil.copy2(file_path, source_copy_path)
+                            future.result()
                             copied_count += 1
-                            final_dest_path = source_copy_path
                             if do_convert:
-                                target_dest_path = self.temp_dir / target_flat_filename
-                                try:
-                                    source_copy_path.rename(target_dest_path)
-                                    converted_count += 1
-                                    final_dest_path = target_dest_path
-                                except Exception as rename_err:
-                                    self.log_status(
-                                        f"Error renaming {source_copy_path.name}:"
-                                        f" {rename_err}"
-                                    )
-                                    if source_copy_path.exists():
-                                        copied_count -= 1
-                                        try:
-                                            source_copy_path.unlink()
-                                        except OSError:
-                                            pass
-                                    continue
-                            files_in_temp.add(final_dest_path.name)
+                                converted_count += 1
+                            flat_names[rel_parts] = flat_name
+                            if sig is not None:
+                                self._copy_cache[flat_name] = sig
+                            else:
+                                self._copy_cache.pop(flat_name, None)
                         except Exception as copy_err:
                             self.log_status(
-                                f"Error copying '{relative_path}': {copy_err}"
+                                f"Error copying '{rel_path_str}': {copy_err}"
                             )
                             read_error_count += 1
-                            copied_count = max(0, copied_count - 1)
-                            if source_copy_path.exists():
-                                try:
-                                    source_copy_path.unlink()
-                                except OSError:
-                                    pass
+                            # Drop the reservation so the sweep removes any
+                            # stale copy left from an earlier refresh.
+                            files_in_temp.discard(flat_name)
+                            self._copy_cache.pop(flat_name, None)
+                            try:
+                                os.unlink(target_path)
+                            except OSError:
+                                pass  # Covers FileNotFoundError; no probe stat
             # --- Post-Processing: Write Output Files ---
             output_actions = []
-            
+            if ndjson_file is not None:
+                try:
+                    ndjson_file.close()
+                    os.replace(ndjson_tmp_path, ndjson_output_path)
+                    if ndjson_records:
+                        output_actions.append(f"Created {ndjson_output_path.name}")
+                except OSError as e:
+                    self.log_status(f"Error closing {ndjson_output_path.name}: {e}")
+            if combined_file is not None:
+                try:
+                    if FADVISE_AVAILABLE:
+                        # The combined file is consumed by other programs,
+                        # never re-read here; hint the kernel to drop its
+                        # (clean) pages rather than evicting hotter ones.
+                        # Not worth an fsync stall just to cover the dirty
+                        # remainder.
+                        combined_file.flush()
+                        try:
+                            os.posix_fadvise(
+                                combined_file.fileno(), 0, 0,
+                                os.POSIX_FADV_DONTNEED,
+                            )
+                        except OSError:
+                            pass
+                    combined_file.close()
+                    os.replace(combined_tmp_path, combined_output_path)
+                    if combined_count:
+                        output_actions.append(
+                            f"Created {combined_output_path.name}"
+                        )
+                except OSError as e:
+                    self.log_status(
+                        f"Error closing {combined_output_path.name}: {e}"
+                    )
+
             # Write Paths Markdown
             if do_paths_md and paths_md_lines:
                 md_output_path = self.temp_dir / "project_file_names_and_locations.md"
                 self.log_status(f"Writing paths MD ({md_entries} files)...")
                 try:
-                    with open(md_output_path, "w", encoding="utf-8") as f:
-                        f.write(f"# Project File Locations\n\n")
-                        f.write(f"**Project:** {self.selected_project['project_name']}\n\n")
-                        f.write(f"**Root:** `{source_dir}`\n\n")
-                        f.write("---\n\n")
-                        f.write("## Files\n\n")
-                        f.write("\n".join(paths_md_lines))
+                    self._write_paths_md(source_dir, paths_md_lines)
                     output_actions.append(f"Created {md_output_path.name}")
                 except Exception as write_err:
                     self.log_status(
                         f"Error writing {md_output_path.name}: {write_err}"
                     )
                     output_actions.append(f"Failed {md_output_path.name}")
-            
+            # Cache the walk result so single-file watch events can be
+            # applied in place without re-walking the whole tree.
+            self._last_source_dir = source_dir_str
+            self._last_included = {
+                rel_parts: abs_path for rel_parts, abs_path, _entry in included_files
+            }
+            self._last_flat_names = flat_names
+            self._md_sections = md_sections
+            # Sweep anything in temp that this refresh did not produce
+            # (removed/newly-ignored files, leftover sidecars, the other
+            # NDJSON variant after toggling compression).
+            keep_names = set(files_in_temp) if do_copy else set()
+            if do_paths_md and paths_md_lines:
+                keep_names.add("project_file_names_and_locations.md")
+            if self.create_ndjson_var.get():
+                keep_names.add(ndjson_output_path.name)
+            if self.combine_files_var.get():
+                keep_names.add(combined_output_path.name)
+            if (source_dir / "read this first.md").is_file():
+                keep_names.add("read this first.md")
+            self._sweep_temp_dir(keep_names)
+
             # --- Final Logging ---
             duration = time.time() - start_time
             ignored_total = ignored_git_count + ignored_incl_count
@@ -1060,16 +1959,24 @@ class Progomatter:
                 notes_count = len([n for n in self.file_notes.values() if n.strip()])
                 if notes_count > 0:
                     summary.append(f"({notes_count} notes)")
+            if do_ndjson:
+                summary.append(f"NDJSON Records: {ndjson_records}")
+            if do_combine:
+                summary.append(f"Combined: {combined_count}")
             if do_copy:
                 summary.append(f"Copied: {copied_count}")
+                if unchanged_skips > 0:
+                    summary.append(f"Unchanged: {unchanged_skips}")
             if do_convert:
                 summary.append(f"Converted: {converted_count}")
             summary.append(
                 f"Skipped: {ignored_total} ({ignored_git_count} gitignore,"
                 f" {ignored_incl_count} include)"
             )
-            if collision_skips > 0:
-                summary.append(f"CopyCollisions: {collision_skips}")
+            if binary_skips > 0:
+                summary.append(f"BinarySkips: {binary_skips}")
+            if collision_renames > 0:
+                summary.append(f"CollisionRenames: {collision_renames}")
             if read_error_count > 0:
                 summary.append(f"Read/Copy Errors: {read_error_count}")
             action_str = (
@@ -1088,6 +1995,17 @@ class Progomatter:
         except Exception as e:
             self.log_status(f"Critical Error during file refresh: {str(e)}")
             traceback.print_exc()
+        finally:
+            if ndjson_file is not None and not ndjson_file.closed:
+                try:
+                    ndjson_file.close()
+                except OSError:
+                    pass
+            if combined_file is not None and not combined_file.closed:
+                try:
+                    combined_file.close()
+                except OSError:
+                    pass
     # --- .include Editor ---
     def edit_include_file(self):
         if not self.selected_project:
@@ -1096,16 +2014,25 @@ class Progomatter:
             )
         project_dir = Path(self.selected_project["directory"])
         include_path = project_dir / ".include"
-        if not include_path.is_file():
+        # EAFP: read straight away and create on FileNotFoundError, rather
+        # than paying an is_file() probe stat before every open.
+        try:
+            include_text = include_path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            include_text = "# Include patterns (*.py, *.html, *.gd, *.rs, *.gdshader)\n"
             try:
-                with open(include_path, "w", encoding="utf-8") as f:
-                    f.write("# Include patterns (*.py, *.html, *.gd, *.rs, *.gdshader)\n")
+                include_path.write_text(include_text, encoding="utf-8")
                 self.log_status(f"Created missing .include file: {include_path}")
             except Exception as e:
                 messagebox.showerror(
                     "Error", f"Could not create .include file:\n{e}", parent=self.root
                 )
                 return
+        except Exception as e:
+            messagebox.showerror(
+                "Error", f"Could not read .include file:\n{e}", parent=self.root
+            )
+            return
         editor_win = Toplevel(self.root)
         editor_win.title(f"Edit .include - {self.selected_project['project_name']}")
         editor_win.geometry("500x450")
@@ -1127,17 +2054,8 @@ class Progomatter:
         scrollbar.grid(row=0, column=1, sticky="ns")
         include_text_widget_editor.config(yscrollcommand=scrollbar.set)
         self.include_editor_text_widget = include_text_widget_editor
-        try:
-            with open(include_path, "r", encoding="utf-8") as f:
-                include_text_widget_editor.insert("1.0", f.read())
-            include_text_widget_editor.edit_reset()
-        except Exception as e:
-            messagebox.showerror(
-                "Error", f"Could not read .include file:\n{e}", parent=editor_win
-            )
-            self.include_editor_text_widget = None
-            editor_win.destroy()
-            return
+        include_text_widget_editor.insert("1.0", include_text)
+        include_text_widget_editor.edit_reset()
         button_frame = ttk.Frame(editor_frame)
         button_frame.pack(fill=X)
         def save_changes():
@@ -1167,6 +2085,29 @@ class Progomatter:
         editor_win.protocol("WM_DELETE_WINDOW", cancel_changes)
         editor_win.wait_window()
     # --- File Watching Control ---
+    def _watch_event_relevant(self, path_str: str) -> bool:
+        """True if a watched path would actually appear in the output.
+
+        Runs the same gitignore/include filters as the refresh walk, so
+        churn in ignored paths (build dirs, logs) no longer triggers
+        full refreshes. Called from the watchdog thread.
+        """
+        prefix = self._watch_prefix
+        if prefix is None:
+            return False
+        # Plain string slicing; building a Path per event is measurable
+        # when an editor or build tool touches many files at once.
+        if not path_str.startswith(prefix):
+            return False
+        rel = path_str[len(prefix):]
+        if not rel:
+            return False
+        rel_parts = tuple(rel.split(os.sep))
+        if rel_parts[-1] in self.CONFIG_FILE_NAMES:
+            return True
+        if self._should_ignore_entry(rel_parts, path_str, False):
+            return False
+        return not self._has_include or self.should_include_rel(rel_parts)
     def start_observer(self):
         if not WATCHDOG_AVAILABLE:
             self.auto_refresh_var.set(False)
@@ -1174,7 +2115,7 @@ class Progomatter:
         if (
             not self.selected_project
             or not self.auto_refresh_var.get()
-            or (self.observer_thread and self.observer_thread.is_alive())
+            or self._watch is not None
         ):
             return
         self.watch_path = Path(self.selected_project["directory"])
@@ -1182,61 +2123,109 @@ class Progomatter:
             self.log_status(f"Cannot watch non-existent directory: {self.watch_path}")
             self.auto_refresh_var.set(False)
             return
-        while not self.callback_queue.empty():
-            try:
-                self.callback_queue.get_nowait()
-            except queue.Empty:
-                break
-        self.observer = Observer()
-        event_handler = ProjectChangeHandler(self.callback_queue)
+        self._watch_prefix = str(self.watch_path).rstrip(os.sep) + os.sep
+        self.callback_queue.clear()  # Drop events from any previous watch
+        event_handler = ProjectChangeHandler(
+            self.callback_queue,
+            notify=self._notify_queue_event,
+            is_relevant=self._watch_event_relevant,
+        )
+        self._change_handler = event_handler
         try:
-            self.observer.schedule(event_handler, str(self.watch_path), recursive=True)
-            self.observer_thread = threading.Thread(
-                target=self.observer.start, daemon=True
+            # One Observer thread serves the whole app session; switching
+            # projects swaps the scheduled watch instead of tearing the
+            # thread down and starting a fresh one (watchdog observers
+            # cannot be restarted after stop() anyway).
+            if self.observer is None:
+                observer = Observer()
+                observer.daemon = True
+                observer.start()  # Observer is itself a Thread
+                self.observer = observer
+            self._watch = self.observer.schedule(
+                event_handler, str(self.watch_path), recursive=True
             )
-            self.observer_thread.start()
             self.log_status(f"File watching started: {self.watch_path}")
         except Exception as e:
             self.log_status(f"Error starting file observer: {e}")
-            self.observer = None
+            self._watch = None
             self.auto_refresh_var.set(False)
     def stop_observer(self):
-        if self.observer and self.observer.is_alive():
+        """Unschedules the current watch; the observer thread stays up."""
+        if self._change_handler is not None:
+            self._change_handler.cancel_pending()
+            self._change_handler = None
+        if self.observer is not None and self._watch is not None:
             try:
-                self.observer.stop()
+                self.observer.unschedule(self._watch)
                 self.log_status("File watching stopped.")
             except Exception as e:
                 self.log_status(f"Error stopping observer: {e}")
-        self.observer = None
-        self.observer_thread = None
+        self._watch = None
         self.watch_path = None
+        self._watch_prefix = None
+    def _shutdown_observer(self):
+        """Stops the persistent observer thread; only called on app exit."""
+        self.stop_observer()
+        if self.observer is not None:
+            try:
+                self.observer.stop()
+            except Exception:
+                pass
+            self.observer = None
     def toggle_observer(self):
         if self.auto_refresh_var.get():
             if self.selected_project:
                 self.start_observer()
         else:
             self.stop_observer()
-    def check_queue(self):
+    def _notify_queue_event(self):
+        """Wakes the main loop from a watcher thread.
+
+        event_generate(when='tail') is one of the few Tk calls documented
+        as safe to issue from another thread; Tcl_CreateFileHandler would
+        be Unix-only, so this keeps Windows working.
+        """
         try:
-            message = self.callback_queue.get_nowait()
-            if (
-                message == "refresh"
-                and self.selected_project
-                and self.auto_refresh_var.get()
-            ):
-                self.log_status("Auto-refresh triggered...")
-                self.refresh_files()
-        except queue.Empty:
-            pass
-        except Exception as e:
-            self.log_status(f"Error checking observer queue: {e}")
-        finally:
-            if self.root.winfo_exists():
-                self.root.after(250, self.check_queue)
+            self.root.event_generate("<<ProgomatterQueue>>", when="tail")
+        except tk.TclError:
+            pass  # Window is being torn down
+    def check_queue(self, event=None):
+        # Drain everything that queued up and coalesce into one refresh;
+        # a full-refresh request anywhere in the batch wins over path sets.
+        refresh_requested = False
+        full_refresh = False
+        merged_paths = set()
+        while True:
+            try:
+                message = self.callback_queue.popleft()
+            except IndexError:
+                break
+            except Exception as e:
+                self.log_status(f"Error checking observer queue: {e}")
+                break
+            if isinstance(message, tuple) and message and message[0] == "refresh":
+                refresh_requested = True
+                if message[1] is None:
+                    full_refresh = True
+                else:
+                    merged_paths |= message[1]
+            elif message == "refresh":
+                refresh_requested = True
+                full_refresh = True
+        if self._change_handler is not None:
+            self._change_handler.mark_drained()
+        if not refresh_requested:
+            return
+        if self.selected_project and self.auto_refresh_var.get():
+            self.log_status("Auto-refresh triggered...")
+            self.refresh_files(
+                changed_paths=None if full_refresh else frozenset(merged_paths)
+            )
     # --- App Lifecycle ---
     def on_closing(self):
         self.log_status("Closing application...")
-        self.stop_observer()
+        self._shutting_down = True
+        self._shutdown_observer()
         self.root.destroy()
     def run(self):
         self.root.mainloop()